@@ -4,7 +4,7 @@ Multi-agent research system with supervisor orchestration.
 """
 
 import os
-from typing import Literal, Dict, Any, List
+from typing import Dict, Any, List, get_args
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
@@ -22,6 +22,7 @@ from agent.prompts import (
     supervisor_routing_prompt,
 )
 from agent.tools_and_schemas import (
+    AgentRoute,
     SynthesisResult,
     HypothesisList,
     ValidationResult,
@@ -29,8 +30,11 @@ from agent.tools_and_schemas import (
     SearchStrategies,
 )
 from agent.utils import (
-    format_papers_for_synthesis,
+    pack_papers_for_synthesis,
+    MAX_PAPERS_FOR_SYNTHESIS,
+    SYNTHESIS_PAPERS_CHAR_BUDGET,
     extract_paper_ids,
+    build_synthesis_keyword_index,
     analyze_state,
     format_synthesis_for_prompt,
 )
@@ -46,6 +50,14 @@ from agent.workflow_utils import (
 
 load_dotenv()
 
+# Upper bound on validation LLM calls in flight at once
+MAX_CONCURRENT_VALIDATIONS = 2
+
+# Routing table from supervisor decision to graph node
+AGENT_ROUTES: Dict[str, str] = {
+    route: END if route == "end" else route for route in get_args(AgentRoute)
+}
+
 # Supervisor Node
 
 def supervisor(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
@@ -113,22 +125,19 @@ def _build_supervisor_state_update(
     }
 
 
-def route_supervisor(state: ResearchState) -> Literal["literature_hunter", "synthesizer", "hypothesis_generator", "validator", "end"]:
+def route_supervisor(state: ResearchState) -> AgentRoute:
     """Route supervisor decisions to appropriate workflow nodes."""
     next_agent = state.get("next_agent")
     should_continue = state.get("should_continue", True)
     
     # End workflow if determined by supervisor
-    if not should_continue or next_agent == "end":
+    if not should_continue:
         return "end"
     
-    # Route to valid agents or default to end
-    valid_agents = {
-        "literature_hunter", "synthesizer", 
-        "hypothesis_generator", "validator"
-    }
-    
-    return next_agent if next_agent in valid_agents else "end"
+    # Tolerate casing/spacing variants from the LLM; unknown agents end the workflow
+    if isinstance(next_agent, str):
+        next_agent = next_agent.strip().lower()
+    return next_agent if next_agent in AGENT_ROUTES else "end"
 
 # Literature Hunter Node
 
@@ -246,12 +255,9 @@ def _consolidate_search_results(
     
     print(f"Found {len(all_papers)} total papers, {len(unique_papers)} unique papers")
     
-    # Convert to dict format and rank
+    # Convert to dict format and keep the top papers up to limit
     paper_dicts = PaperProcessor.convert_papers_to_dict(unique_papers)
-    ranked_papers = PaperProcessor.rank_papers(paper_dicts)
-    
-    # Return top papers up to limit
-    return ranked_papers[:max_papers]
+    return PaperProcessor.rank_papers(paper_dicts, limit=max_papers)
 
 
 def _build_literature_search_state_update(
@@ -294,7 +300,7 @@ def synthesizer(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         return _build_synthesis_error_state(state, "No papers available for synthesis")
     
     # Generate synthesis using LLM
-    synthesis_result, synthesis_prompt = _generate_synthesis(state, configurable, papers)
+    synthesis_result, synthesis_prompt, papers_analyzed = _generate_synthesis(state, configurable, papers)
     
     # Record synthesis completion with actual prompt
     WorkflowLogger.record_stage(
@@ -302,7 +308,10 @@ def synthesizer(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         agent_name="synthesizer",
         prompt=synthesis_prompt,
         response=synthesis_result,
-        additional_data={"papers_analyzed": len(papers)}
+        additional_data={
+            "papers_analyzed": papers_analyzed,
+            "papers_omitted": len(papers) - papers_analyzed,
+        }
     )
     
     return _build_synthesis_state_update(state, synthesis_result)
@@ -312,16 +321,25 @@ def _generate_synthesis(
     state: ResearchState,
     configurable: ResearchWorkflowConfiguration,
     papers: List[Dict[str, Any]]
-) -> tuple[SynthesisResult, str]:
-    """Generate synthesis using LLM analysis of papers and return both result and prompt."""
+) -> tuple[SynthesisResult, str, int]:
+    """Generate synthesis using LLM analysis of papers; return result, prompt and papers analyzed."""
     llm = LLMProvider.create_llm(
         configurable, 
         temperature=configurable.temperature_settings.synthesis
     )
     
-    papers_summary = format_papers_for_synthesis(papers)
+    papers_summary, papers_analyzed = pack_papers_for_synthesis(
+        papers, max_papers=MAX_PAPERS_FOR_SYNTHESIS, max_chars=SYNTHESIS_PAPERS_CHAR_BUDGET
+    )
+    if papers_analyzed < len(papers):
+        papers_over_cap = max(0, len(papers) - MAX_PAPERS_FOR_SYNTHESIS)
+        papers_over_budget = len(papers) - papers_over_cap - papers_analyzed
+        print(f"Synthesis prompt includes {papers_analyzed} of {len(papers)} papers "
+              f"({papers_over_cap} beyond the {MAX_PAPERS_FOR_SYNTHESIS}-paper cap, "
+              f"{papers_over_budget} to fit the size budget)")
+    
     synthesis_prompt_text = synthesis_prompt.format(
-        num_papers=len(papers),
+        num_papers=papers_analyzed,
         papers_summary=papers_summary,
         current_data=state,
     )
@@ -330,7 +348,7 @@ def _generate_synthesis(
     synthesis = structured_llm.invoke(synthesis_prompt_text)
     
     RateLimiter.apply_rate_limit()
-    return synthesis, synthesis_prompt_text
+    return synthesis, synthesis_prompt_text, papers_analyzed
 
 
 def _build_synthesis_error_state(state: ResearchState, error_message: str) -> Dict[str, Any]:
@@ -423,10 +441,13 @@ def _process_hypotheses(
     """Process hypotheses by adding supporting paper references and ranking."""
     processed_hypotheses = []
     
+    # Tokenize the synthesis once and match every hypothesis against it
+    keyword_index = build_synthesis_keyword_index(synthesis)
+    
     for hypothesis in hypotheses_result.hypotheses:
         # Add paper IDs from synthesis that support this hypothesis
-        hypothesis.supporting_papers = extract_paper_ids(synthesis, hypothesis.content)
-        processed_hypotheses.append(hypothesis.dict())
+        hypothesis.supporting_papers = extract_paper_ids(synthesis, hypothesis.content, keyword_index)
+        processed_hypotheses.append(hypothesis.model_dump())
     
     # Sort by confidence score (highest first)
     return sorted(
@@ -496,35 +517,36 @@ def _validate_hypotheses(
     configurable: ResearchWorkflowConfiguration,
     hypotheses_to_validate: List[Dict[str, Any]]
 ) -> tuple[List[Dict[str, Any]], List[str]]:
-    """Validate each hypothesis using LLM assessment and return results with prompts."""
+    """Validate hypotheses concurrently using LLM assessment and return results with prompts."""
     llm = LLMProvider.create_llm(
         configurable, 
         temperature=configurable.temperature_settings.validation
     )
     
-    validation_results = []
-    validation_prompts = []
-    
-    for hypothesis in hypotheses_to_validate:
-        # Generate validation prompt for this hypothesis
-        validation_prompt_text = validation_prompt.format(
+    validation_prompts = [
+        validation_prompt.format(
             hypothesis=hypothesis.get("content", ""),
             confidence_score=hypothesis.get("confidence_score", 0),
             reasoning=hypothesis.get("reasoning", ""),
             supporting_papers=len(hypothesis.get("supporting_papers", [])),
             current_data=state,
         )
-        
-        validation_prompts.append(validation_prompt_text)
-        
-        # Get structured validation assessment
-        structured_llm = llm.with_structured_output(ValidationResult)
-        validation = structured_llm.invoke(validation_prompt_text)
-        
-        # Apply rate limiting between validations
-        RateLimiter.apply_rate_limit()
-
-        # Build validation result with hypothesis reference
+        for hypothesis in hypotheses_to_validate
+    ]
+    
+    # Validations are independent, so run a bounded number of them at once
+    structured_llm = llm.with_structured_output(ValidationResult)
+    validations = structured_llm.batch(
+        validation_prompts,
+        config={"max_concurrency": MAX_CONCURRENT_VALIDATIONS},
+    )
+    
+    # Apply rate limiting for API respect
+    RateLimiter.apply_rate_limit()
+    
+    # Build validation results with hypothesis reference
+    validation_results = []
+    for hypothesis, validation in zip(hypotheses_to_validate, validations):
         validation_dict = validation.model_dump()
         validation_dict["hypothesis_id"] = hypothesis.get("id")
         validation_results.append(validation_dict)
@@ -579,17 +601,7 @@ graph_builder.add_node("validator", validator)
 graph_builder.add_edge(START, "supervisor")
 
 # Add conditional routing from supervisor based on decisions
-graph_builder.add_conditional_edges(
-    "supervisor",
-    route_supervisor,
-    {
-        "literature_hunter": "literature_hunter",
-        "synthesizer": "synthesizer",
-        "hypothesis_generator": "hypothesis_generator",
-        "validator": "validator",
-        "end": END,
-    }
-)
+graph_builder.add_conditional_edges("supervisor", route_supervisor, AGENT_ROUTES)
 
 # All agents return control to supervisor for next decision
 graph_builder.add_edge("literature_hunter", "supervisor")
@@ -4,9 +4,11 @@ Provides PromptTemplate wrapper that auto-injects current_date and current_data
 into format calls for consistent prompt context across all agents.
 """
 
+from collections import ChainMap
 from datetime import datetime
 import json
-from typing import Any, Dict
+from string import Formatter
+from typing import Any, Dict, FrozenSet, Tuple
 
 
 def get_current_date() -> str:
@@ -19,6 +21,39 @@ class PromptTemplate:
 
   def __init__(self, template: str):
     self.template = template
+    self._compiled_template, self._field_names = self._compile(template)
+    # Decide once which auto-injected fields this template references
+    self._injects_current_date = "current_date" in self._field_names
+    self._injects_current_data = "current_data" in self._field_names
+
+  @staticmethod
+  def _compile(template: str) -> Tuple[str, FrozenSet[str]]:
+    """Parse placeholders once, escaping brace groups that aren't format fields.
+
+    Prompts spell out JSON shapes like {description, paper_ids, confidence};
+    those are kept as literal text instead of failing as unknown fields.
+    """
+    parts = []
+    field_names = set()
+    for literal_text, field_name, format_spec, conversion in Formatter().parse(template):
+      parts.append(literal_text.replace("{", "{{").replace("}", "}}"))
+      if field_name is None:
+        continue
+
+      placeholder = field_name
+      if conversion:
+        placeholder += "!" + conversion
+      if format_spec:
+        placeholder += ":" + format_spec
+
+      root_name = field_name.split(".", 1)[0].split("[", 1)[0]
+      if root_name.isidentifier() or root_name.isdigit() or not root_name:
+        field_names.add(root_name)
+        parts.append("{" + placeholder + "}")
+      else:
+        parts.append("{{" + placeholder + "}}")
+
+    return "".join(parts), frozenset(field_names)
 
   def _serialize_current_data(self, context: Dict[str, Any]) -> str:
     """Serialize formatting context as JSON string."""
@@ -28,15 +63,19 @@ class PromptTemplate:
       return str(context)
 
   def format(self, *args, **kwargs) -> str:
-    merged: Dict[str, Any] = dict(kwargs)
+    injected: Dict[str, Any] = {}
 
-    # Auto-inject current_date and current_data if not provided
-    if "current_date" not in merged:
-      merged["current_date"] = get_current_date()
-    if "current_data" not in merged:
-      merged["current_data"] = self._serialize_current_data(merged)
+    # Auto-inject current_date and current_data if referenced and not provided
+    if self._injects_current_date and "current_date" not in kwargs:
+      injected["current_date"] = get_current_date()
+    if self._injects_current_data and "current_data" not in kwargs:
+      injected["current_data"] = self._serialize_current_data({**kwargs, **injected})
 
-    return self.template.format(*args, **merged)
+    if args:
+      return self._compiled_template.format(*args, **kwargs, **injected)
+
+    # Look fields up in place rather than copying kwargs into a merged dict
+    return self._compiled_template.format_map(ChainMap(kwargs, injected) if injected else kwargs)
 
 
 # Supervisor Prompts
@@ -11,7 +11,9 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
+import hashlib
 import re
+import sys
 from urllib.parse import quote
 from ratelimit import limits, sleep_and_retry
 import numpy as np
@@ -19,7 +21,11 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
 
-@dataclass
+SSRN_ABSTRACT_ID_PATTERN = re.compile(r'abstract=(\d+)')
+TITLE_NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+@dataclass(slots=True)
 class Paper:
     """Unified paper representation across preprint servers."""
     id: str
@@ -37,6 +43,19 @@ class Paper:
     relevance_score: float = 0.0
     quality_score: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        # Sources, categories and author names repeat verbatim across a corpus;
+        # interning shares one string object per distinct value.
+        if isinstance(self.source, str):
+            self.source = sys.intern(self.source)
+        self.categories = _intern_strings(self.categories)
+        self.authors = _intern_strings(self.authors)
+
+
+def _intern_strings(values: List[Any]) -> List[Any]:
+    """Intern string entries of a list, leaving other values untouched."""
+    return [sys.intern(v) if type(v) is str else v for v in values]
 
 
 class PreprintAPI(ABC):
@@ -65,20 +84,31 @@ class PreprintAPI(ABC):
         """Retrieve a specific paper by ID"""
         pass
     
-    def calculate_relevance(self, paper: Paper, query: str) -> float:
-        """Calculate relevance score using TF-IDF similarity"""
-        documents = [query, f"{paper.title} {paper.abstract}"]
+    def assign_relevance_scores(self, papers: List[Paper], query: str) -> None:
+        """Score relevance for a batch of papers with a single TF-IDF fit"""
+        if not papers or not query.strip():
+            return  # Nothing to match against, keep default scores
+        
+        documents = [query] + [f"{paper.title} {paper.abstract}" for paper in papers]
         vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform(documents)
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return float(similarity)
+        try:
+            tfidf_matrix = vectorizer.fit_transform(documents)
+        except ValueError:
+            return  # Only stop words in query and papers
+        
+        similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
+        for paper, similarity in zip(papers, similarities.tolist()):
+            paper.relevance_score = float(similarity)
     
-    def calculate_quality(self, paper: Paper) -> float:
-        """Calculate quality score based on various metrics"""
+    def calculate_quality(self, paper: Paper, now: Optional[datetime] = None) -> float:
+        """Calculate quality score based on various metrics
+        
+        Pass ``now`` when scoring a batch so the clock is read once per batch.
+        """
         score = 0.0
         
         # Recency bonus (papers from last 2 years)
-        days_old = (datetime.now() - paper.date_published).days
+        days_old = ((now or datetime.now()) - paper.date_published).days
         if days_old < 730:  # 2 years
             score += max(0, (730 - days_old) / 730) * 0.3
         
@@ -131,8 +161,9 @@ class ArxivAPI(PreprintAPI):
         
         async with self.session.get(self.BASE_URL, params=params) as response:
             xml_data = await response.text()
-            
-        return self._parse_arxiv_response(xml_data, query)
+        
+        # Parsing and TF-IDF scoring are CPU-bound, keep them off the event loop
+        return await asyncio.to_thread(self._parse_arxiv_response, xml_data, query)
     
     def _build_query(self, query: str) -> str:
         """Build advanced arXiv query"""
@@ -161,6 +192,7 @@ class ArxivAPI(PreprintAPI):
         if not isinstance(entries, list):
             entries = [entries]
         
+        now = datetime.now()
         for entry in entries:
             try:
                 # Extract authors
@@ -205,9 +237,7 @@ class ArxivAPI(PreprintAPI):
                     }
                 )
                 
-                # Calculate scores
-                paper.relevance_score = self.calculate_relevance(paper, query)
-                paper.quality_score = self.calculate_quality(paper)
+                paper.quality_score = self.calculate_quality(paper, now)
                 
                 papers.append(paper)
                 
@@ -215,6 +245,8 @@ class ArxivAPI(PreprintAPI):
                 print(f"Error parsing arXiv entry: {e}")
                 continue
         
+        self.assign_relevance_scores(papers, query)
+        
         return papers
     
     async def get_paper(self, paper_id: str) -> Optional[Paper]:
@@ -257,6 +289,7 @@ class BioRxivAPI(PreprintAPI):
         
         papers = []
         cursor = 0
+        query_keywords = query.lower().split()
         
         while len(papers) < max_results:
             url = f"{self.BASE_URL}/details/{self.server}/{start_date}/{end_date}/{cursor}"
@@ -272,8 +305,8 @@ class BioRxivAPI(PreprintAPI):
                 
                 for item in data['collection']:
                     # Basic text matching (their API doesn't support full-text search)
-                    if self._matches_query(item, query):
-                        paper = self._parse_biorxiv_paper(item, query)
+                    if self._matches_query(item, query_keywords):
+                        paper = self._parse_biorxiv_paper(item)
                         papers.append(paper)
                         
                         if len(papers) >= max_results:
@@ -285,20 +318,20 @@ class BioRxivAPI(PreprintAPI):
                 if len(data['collection']) < 100:
                     break
         
-        return papers[:max_results]
-    
-    def _matches_query(self, item: dict, query: str) -> bool:
-        """Check if paper matches query terms"""
-        query_lower = query.lower()
-        keywords = query_lower.split()
+        papers = papers[:max_results]
+        await asyncio.to_thread(self.assign_relevance_scores, papers, query)
         
+        return papers
+    
+    def _matches_query(self, item: dict, keywords: List[str]) -> bool:
+        """Check if paper matches lowercased query keywords"""
         searchable_text = f"{item.get('title', '')} {item.get('abstract', '')}".lower()
         
         # Require at least half of the keywords to match
         matches = sum(1 for keyword in keywords if keyword in searchable_text)
         return matches >= len(keywords) / 2
     
-    def _parse_biorxiv_paper(self, item: dict, query: str) -> Paper:
+    def _parse_biorxiv_paper(self, item: dict) -> Paper:
         """Parse bioRxiv/medRxiv paper data"""
         paper = Paper(
             id=item.get('doi', ''),
@@ -318,7 +351,6 @@ class BioRxivAPI(PreprintAPI):
             }
         )
         
-        paper.relevance_score = self.calculate_relevance(paper, query)
         paper.quality_score = self.calculate_quality(paper)
         
         return paper
@@ -334,7 +366,7 @@ class BioRxivAPI(PreprintAPI):
             data = await response.json()
             
             if 'collection' in data and data['collection']:
-                return self._parse_biorxiv_paper(data['collection'][0], "")
+                return self._parse_biorxiv_paper(data['collection'][0])
         
         return None
 
@@ -371,7 +403,7 @@ class ChemRxivAPI(PreprintAPI):
                     break
                 
                 for item in data['itemHits']:
-                    paper = self._parse_chemrxiv_paper(item, query)
+                    paper = self._parse_chemrxiv_paper(item)
                     papers.append(paper)
                     
                     if len(papers) >= max_results:
@@ -383,9 +415,12 @@ class ChemRxivAPI(PreprintAPI):
                 if skip >= data.get('totalCount', 0):
                     break
         
-        return papers[:max_results]
+        papers = papers[:max_results]
+        await asyncio.to_thread(self.assign_relevance_scores, papers, query)
+        
+        return papers
     
-    def _parse_chemrxiv_paper(self, item: dict, query: str) -> Paper:
+    def _parse_chemrxiv_paper(self, item: dict) -> Paper:
         """Parse ChemRxiv paper data"""
         # Extract authors
         authors = []
@@ -414,7 +449,6 @@ class ChemRxivAPI(PreprintAPI):
             }
         )
         
-        paper.relevance_score = self.calculate_relevance(paper, query)
         paper.quality_score = self.calculate_quality(paper)
         
         return paper
@@ -428,7 +462,7 @@ class ChemRxivAPI(PreprintAPI):
                 return None
                 
             data = await response.json()
-            return self._parse_chemrxiv_paper(data, "")
+            return self._parse_chemrxiv_paper(data)
 
 
 class SSRNApi(PreprintAPI):
@@ -454,17 +488,19 @@ class SSRNApi(PreprintAPI):
             feed = feedparser.parse(content)
             
             for entry in feed.entries[:max_results]:
-                paper = self._parse_ssrn_entry(entry, query)
+                paper = self._parse_ssrn_entry(entry)
                 papers.append(paper)
         
+        await asyncio.to_thread(self.assign_relevance_scores, papers, query)
+        
         return papers
     
-    def _parse_ssrn_entry(self, entry: dict, query: str) -> Paper:
+    def _parse_ssrn_entry(self, entry: dict) -> Paper:
         """Parse SSRN RSS feed entry"""
         # Extract abstract ID from link
         abstract_id = ""
         if 'link' in entry:
-            match = re.search(r'abstract=(\d+)', entry.link)
+            match = SSRN_ABSTRACT_ID_PATTERN.search(entry.link)
             if match:
                 abstract_id = match.group(1)
         
@@ -486,7 +522,6 @@ class SSRNApi(PreprintAPI):
             pdf_url=f"https://papers.ssrn.com/sol3/Delivery.cfm/SSRN_ID{abstract_id}_code.pdf?abstractid={abstract_id}" if abstract_id else None
         )
         
-        paper.relevance_score = self.calculate_relevance(paper, query)
         paper.quality_score = self.calculate_quality(paper)
         
         return paper
@@ -528,7 +563,7 @@ class ResearchSquareAPI(PreprintAPI):
                     break
                 
                 for item in data['data']:
-                    paper = self._parse_rs_paper(item, query)
+                    paper = self._parse_rs_paper(item)
                     papers.append(paper)
                     
                     if len(papers) >= max_results:
@@ -540,9 +575,12 @@ class ResearchSquareAPI(PreprintAPI):
                 if page > data.get('meta', {}).get('last_page', 1):
                     break
         
-        return papers[:max_results]
+        papers = papers[:max_results]
+        await asyncio.to_thread(self.assign_relevance_scores, papers, query)
+        
+        return papers
     
-    def _parse_rs_paper(self, item: dict, query: str) -> Paper:
+    def _parse_rs_paper(self, item: dict) -> Paper:
         """Parse Research Square paper data"""
         authors = [author.get('name', '') for author in item.get('authors', [])]
         
@@ -566,7 +604,6 @@ class ResearchSquareAPI(PreprintAPI):
             }
         )
         
-        paper.relevance_score = self.calculate_relevance(paper, query)
         paper.quality_score = self.calculate_quality(paper)
         
         return paper
@@ -580,7 +617,7 @@ class ResearchSquareAPI(PreprintAPI):
                 return None
                 
             data = await response.json()
-            return self._parse_rs_paper(data, "")
+            return self._parse_rs_paper(data)
 
 
 class PreprintAggregator:
@@ -589,6 +626,28 @@ class PreprintAggregator:
     and implements intelligent ranking strategies
     """
     
+    # Keywords that signal each research field in a query
+    FIELD_KEYWORDS = {
+        'physics': ['quantum', 'particle', 'relativity', 'cosmology', 'physics'],
+        'computer science': ['algorithm', 'machine learning', 'neural network', 'software', 'computation'],
+        'mathematics': ['theorem', 'proof', 'algebra', 'topology', 'calculus'],
+        'biology': ['cell', 'protein', 'gene', 'dna', 'evolution', 'organism'],
+        'medicine': ['treatment', 'disease', 'clinical', 'patient', 'therapy', 'drug'],
+        'chemistry': ['molecule', 'reaction', 'compound', 'synthesis', 'catalyst'],
+        'economics': ['market', 'economy', 'finance', 'trade', 'monetary'],
+        'social sciences': ['society', 'psychology', 'behavior', 'culture', 'social']
+    }
+    
+    # Source reputation weights used in ranking (unlisted sources get 0.8)
+    SOURCE_WEIGHTS = {
+        'arxiv': 1.0,
+        'biorxiv': 0.95,
+        'medrxiv': 0.95,
+        'chemrxiv': 0.9,
+        'researchsquare': 0.85,
+        'ssrn': 0.85
+    }
+    
     def __init__(self):
         self.apis = {
             'arxiv': ArxivAPI(),
@@ -616,19 +675,8 @@ class PreprintAggregator:
         """Detect the research field from the query"""
         query_lower = query.lower()
         
-        field_keywords = {
-            'physics': ['quantum', 'particle', 'relativity', 'cosmology', 'physics'],
-            'computer science': ['algorithm', 'machine learning', 'neural network', 'software', 'computation'],
-            'mathematics': ['theorem', 'proof', 'algebra', 'topology', 'calculus'],
-            'biology': ['cell', 'protein', 'gene', 'dna', 'evolution', 'organism'],
-            'medicine': ['treatment', 'disease', 'clinical', 'patient', 'therapy', 'drug'],
-            'chemistry': ['molecule', 'reaction', 'compound', 'synthesis', 'catalyst'],
-            'economics': ['market', 'economy', 'finance', 'trade', 'monetary'],
-            'social sciences': ['society', 'psychology', 'behavior', 'culture', 'social']
-        }
-        
         field_scores = {}
-        for field, keywords in field_keywords.items():
+        for field, keywords in self.FIELD_KEYWORDS.items():
             score = sum(1 for keyword in keywords if keyword in query_lower)
             if score > 0:
                 field_scores[field] = score
@@ -693,26 +741,28 @@ class PreprintAggregator:
     def _deduplicate(self, papers: List[Paper]) -> List[Paper]:
         """Remove duplicate papers based on title similarity"""
         unique_papers = []
-        seen_titles = set()
+        index_by_title: Dict[bytes, int] = {}
         
         for paper in papers:
             # Normalize title for comparison
-            normalized_title = re.sub(r'[^a-z0-9]+', '', paper.title.lower())
+            title_key = self._title_key(paper.title)
+            existing_index = index_by_title.get(title_key)
             
-            if normalized_title not in seen_titles:
-                seen_titles.add(normalized_title)
+            if existing_index is None:
+                index_by_title[title_key] = len(unique_papers)
                 unique_papers.append(paper)
-            else:
+            elif paper.quality_score > unique_papers[existing_index].quality_score:
                 # If duplicate, keep the one with higher quality score
-                for i, existing in enumerate(unique_papers):
-                    existing_normalized = re.sub(r'[^a-z0-9]+', '', existing.title.lower())
-                    if existing_normalized == normalized_title:
-                        if paper.quality_score > existing.quality_score:
-                            unique_papers[i] = paper
-                        break
+                unique_papers[existing_index] = paper
         
         return unique_papers
     
+    @staticmethod
+    def _title_key(title: str) -> bytes:
+        """Fixed-size dedup key: digest of the title with case, punctuation and spacing removed"""
+        normalized_title = TITLE_NON_WORD_PATTERN.sub('', title.lower())
+        return hashlib.blake2b(normalized_title.encode(), digest_size=16).digest()
+    
     def _rank_papers(self, papers: List[Paper], query: str) -> List[Paper]:
         """
         Rank papers using a multi-factor scoring system
@@ -723,34 +773,30 @@ class PreprintAggregator:
         - Recency (20%)
         - Source reputation (10%)
         """
-        source_weights = {
-            'arxiv': 1.0,
-            'biorxiv': 0.95,
-            'medrxiv': 0.95,
-            'chemrxiv': 0.9,
-            'researchsquare': 0.85,
-            'ssrn': 0.85
-        }
-        
-        for paper in papers:
-            # Calculate recency score
-            days_old = (datetime.now() - paper.date_published).days
-            recency_score = max(0, 1 - (days_old / 365))  # Linear decay over 1 year
-            
-            # Get source weight
-            source_score = source_weights.get(paper.source, 0.8)
-            
-            # Calculate final score
-            paper.metadata['ranking_score'] = (
-                paper.relevance_score * 0.4 +
-                paper.quality_score * 0.3 +
-                recency_score * 0.2 +
-                source_score * 0.1
-            )
-        
-        # Sort by ranking score
-        papers.sort(key=lambda p: p.metadata['ranking_score'], reverse=True)
-        
+        if not papers:
+            return papers
+
+        # Gather each factor into a column so scoring is one vectorized pass
+        now = datetime.now()
+        count = len(papers)
+        relevance = np.fromiter((p.relevance_score for p in papers), dtype=np.float64, count=count)
+        quality = np.fromiter((p.quality_score for p in papers), dtype=np.float64, count=count)
+        days_old = np.fromiter(((now - p.date_published).days for p in papers), dtype=np.float64, count=count)
+        source_weights = self.SOURCE_WEIGHTS
+        source = np.fromiter((source_weights.get(p.source, 0.8) for p in papers), dtype=np.float64, count=count)
+
+        # Linear recency decay over 1 year
+        recency = np.maximum(0.0, 1.0 - days_old / 365)
+
+        scores = relevance * 0.4 + quality * 0.3 + recency * 0.2 + source * 0.1
+
+        for paper, score in zip(papers, scores.tolist()):
+            paper.metadata['ranking_score'] = score
+
+        # Sort by ranking score (stable, highest first)
+        order = np.argsort(-scores, kind='stable')
+        papers[:] = [papers[i] for i in order]
+
         return papers
 
 
@@ -1,11 +1,16 @@
 """Pydantic schemas for HypothesisAI structured outputs."""
 
+from datetime import datetime
 from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 
 # Supervisor Schemas
 
+# Every route the supervisor can take; graph.AGENT_ROUTES is built from this
+AgentRoute = Literal["literature_hunter", "synthesizer", "hypothesis_generator", "validator", "end"]
+
+
 class SupervisorDecision(BaseModel):
     """Supervisor routing decision"""
     next_agent: str = Field(description="Next agent to execute")
@@ -70,13 +75,11 @@ class Paper(BaseModel):
     @property
     def year(self) -> Optional[int]:
         """Extract year from date_published."""
-        try:
-            from datetime import datetime
-            if isinstance(self.date_published, str):
-                dt = datetime.fromisoformat(self.date_published.replace('Z', '+00:00'))
-                return dt.year
+        if not isinstance(self.date_published, str):
             return None
-        except:
+        try:
+            return datetime.fromisoformat(self.date_published.replace('Z', '+00:00')).year
+        except ValueError:
             return None
 
 
@@ -3,10 +3,12 @@
 Text processing, data formatting, and analysis utilities.
 """
 
-from typing import Any, Dict, List, Optional, Set
+from itertools import islice
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
 import hashlib
 import re
+import time
 from datetime import datetime
 
 
@@ -21,6 +23,12 @@ DEFAULT_PAPER_RELEVANCE_SCORE = 0.5
 TITLE_WEIGHT_IN_RELEVANCE = 0.6
 ABSTRACT_WEIGHT_IN_RELEVANCE = 0.4
 MAX_ABSTRACT_LENGTH_FOR_DISPLAY = 300
+MAX_PAPERS_FOR_SYNTHESIS = 20
+SYNTHESIS_PAPERS_CHAR_BUDGET = 24000
+PAPER_SUMMARY_SEPARATOR = "\n\n---\n\n"
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_RUN_PATTERN = re.compile(r'\s+')
 
 
 def extract_research_topic_from_messages(messages: List[AnyMessage]) -> str:
@@ -42,17 +50,61 @@ def extract_research_topic_from_messages(messages: List[AnyMessage]) -> str:
     return "\n".join(topic_parts)
 
 
-def format_papers_for_synthesis(papers: List[Dict[str, Any]], max_papers: int = 20) -> str:
-    """Format paper collection into structured text for synthesis."""
+def format_papers_for_synthesis(
+    papers: List[Dict[str, Any]], 
+    max_papers: int = MAX_PAPERS_FOR_SYNTHESIS
+) -> str:
+    """
+    Format paper collection into structured text for synthesis.
+    
+    Args:
+        papers: Ranked list of paper dictionaries
+        max_papers: Maximum number of papers to include
+        
+    Returns:
+        Formatted papers text
+    """
+    return pack_papers_for_synthesis(papers, max_papers)[0]
+
+
+def pack_papers_for_synthesis(
+    papers: List[Dict[str, Any]], 
+    max_papers: int = MAX_PAPERS_FOR_SYNTHESIS,
+    max_chars: Optional[int] = None
+) -> Tuple[str, int]:
+    """
+    Format papers for synthesis and report how many made it into the text.
+    
+    Args:
+        papers: Ranked list of paper dictionaries
+        max_papers: Maximum number of papers to include
+        max_chars: Optional size budget; papers are packed in order until the
+            next summary would exceed it (the first paper is always included)
+        
+    Returns:
+        Tuple of formatted papers text and number of papers included
+    """
     if not papers:
-        return "No papers available for synthesis."
+        return "No papers available for synthesis.", 0
     
-    formatted_papers = []
-    for index, paper in enumerate(papers[:max_papers], 1):
-        paper_summary = _create_paper_summary(paper, index)
-        formatted_papers.append(paper_summary)
+    paper_summaries = (
+        _create_paper_summary(paper, index)
+        for index, paper in enumerate(islice(papers, max_papers), 1)
+    )
+    if max_chars is None:
+        packed_summaries = list(paper_summaries)
+        return PAPER_SUMMARY_SEPARATOR.join(packed_summaries), len(packed_summaries)
+    
+    packed_summaries = []
+    used_chars = 0
+    for paper_summary in paper_summaries:
+        summary_chars = len(paper_summary) + (len(PAPER_SUMMARY_SEPARATOR) if packed_summaries else 0)
+        if packed_summaries and used_chars + summary_chars > max_chars:
+            break
+        packed_summaries.append(paper_summary)
+        used_chars += summary_chars
     
-    return "\n\n---\n\n".join(formatted_papers)
+    return PAPER_SUMMARY_SEPARATOR.join(packed_summaries), len(packed_summaries)
 
 
 def _create_paper_summary(paper: Dict[str, Any], paper_number: int) -> str:
@@ -121,7 +173,7 @@ def _format_findings_section(findings: List[str], max_findings: int = 5) -> str:
         return ""
     
     lines = ["KEY FINDINGS:"]
-    for finding in findings[:max_findings]:
+    for finding in islice(findings, max_findings):
         lines.append(f"- {finding}")
     
     return "\n".join(lines)
@@ -133,7 +185,7 @@ def _format_gaps_section(gaps: List[str], max_gaps: int = 5) -> str:
         return ""
     
     lines = ["RESEARCH GAPS:"]
-    for gap in gaps[:max_gaps]:
+    for gap in islice(gaps, max_gaps):
         lines.append(f"- {gap}")
     
     return "\n".join(lines)
@@ -186,17 +238,16 @@ def remove_duplicate_papers(papers: List[Dict[str, Any]]) -> List[Dict[str, Any]
     Returns:
         Deduplicated list of papers
     """
-    seen_titles: Set[str] = set()
-    unique_papers = []
+    # First paper seen for each normalized title wins
+    papers_by_title: Dict[str, Dict[str, Any]] = {}
     
     for paper in papers:
         normalized_title = _normalize_paper_title(paper.get('title', ''))
         
-        if normalized_title and normalized_title not in seen_titles:
-            seen_titles.add(normalized_title)
-            unique_papers.append(paper)
+        if normalized_title:
+            papers_by_title.setdefault(normalized_title, paper)
     
-    return unique_papers
+    return list(papers_by_title.values())
 
 
 def _normalize_paper_title(title: str) -> str:
@@ -205,9 +256,9 @@ def _normalize_paper_title(title: str) -> str:
         return ""
     
     # Convert to lowercase and remove punctuation
-    normalized = re.sub(r'[^\w\s]', '', title.lower().strip())
+    normalized = PUNCTUATION_PATTERN.sub('', title.lower().strip())
     # Collapse multiple spaces into single spaces
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = WHITESPACE_RUN_PATTERN.sub(' ', normalized)
     
     return normalized
 
@@ -241,16 +292,16 @@ def calculate_paper_relevance_score(title: str, abstract: str, query: str) -> fl
     return min(1.0, max(0.0, relevance_score))
 
 
-def _extract_meaningful_keywords(text: str) -> Set[str]:
+def _extract_meaningful_keywords(text: str) -> FrozenSet[str]:
     """Extract meaningful keywords by removing stop words."""
     if not text:
-        return set()
+        return frozenset()
     
-    words = set(text.lower().split())
+    words = frozenset(text.lower().split())
     return words - COMMON_STOP_WORDS
 
 
-def _calculate_text_overlap(text: str, keywords: Set[str]) -> float:
+def _calculate_text_overlap(text: str, keywords: FrozenSet[str]) -> float:
     """Calculate overlap between text and keyword set."""
     if not text or not keywords:
         return 0.0
@@ -261,9 +312,34 @@ def _calculate_text_overlap(text: str, keywords: Set[str]) -> float:
     return overlap_count / len(keywords)
 
 
+def build_synthesis_keyword_index(synthesis: Dict[str, Any]) -> List[Tuple[FrozenSet[str], List[str]]]:
+    """
+    Tokenize synthesis patterns and key findings once for matching many hypotheses.
+    
+    Args:
+        synthesis: Synthesis dictionary containing patterns and findings
+        
+    Returns:
+        List of (keywords, paper IDs) entries, patterns first then findings
+    """
+    keyword_index = [
+        (frozenset(pattern.get('description', '').lower().split()), pattern.get('paper_ids', []))
+        for pattern in synthesis.get('patterns', [])
+    ]
+    
+    # Key findings map to index-based paper IDs as heuristic
+    keyword_index.extend(
+        (frozenset(finding.lower().split()), [f"p{index}"])
+        for index, finding in enumerate(synthesis.get('key_findings', []), 1)
+    )
+    
+    return keyword_index
+
+
 def extract_relevant_paper_ids(
     synthesis: Dict[str, Any], 
-    hypothesis_content: Optional[str] = None
+    hypothesis_content: Optional[str] = None,
+    keyword_index: Optional[List[Tuple[FrozenSet[str], List[str]]]] = None
 ) -> List[str]:
     """
     Extract paper IDs relevant to a specific hypothesis or all papers from synthesis.
@@ -271,49 +347,35 @@ def extract_relevant_paper_ids(
     Args:
         synthesis: Synthesis dictionary containing patterns and findings
         hypothesis_content: Optional hypothesis text for relevance filtering
+        keyword_index: Optional prebuilt index from build_synthesis_keyword_index,
+            reused when matching several hypotheses against the same synthesis
         
     Returns:
         List of paper IDs relevant to the hypothesis
     """
     if hypothesis_content:
-        return _find_hypothesis_relevant_papers(synthesis, hypothesis_content)
+        if keyword_index is None:
+            keyword_index = build_synthesis_keyword_index(synthesis)
+        return _find_hypothesis_relevant_papers(keyword_index, hypothesis_content)
     else:
         return _extract_all_synthesis_paper_ids(synthesis)
 
 
-def _find_hypothesis_relevant_papers(synthesis: Dict[str, Any], hypothesis_content: str) -> List[str]:
-    """Find paper IDs relevant to a specific hypothesis."""
+def _find_hypothesis_relevant_papers(
+    keyword_index: List[Tuple[FrozenSet[str], List[str]]],
+    hypothesis_content: str
+) -> List[str]:
+    """Find paper IDs of indexed patterns and findings sharing a keyword with the hypothesis."""
     hypothesis_keywords = _extract_meaningful_keywords(hypothesis_content)
     relevant_paper_ids: Set[str] = set()
     
-    # Find relevant patterns
-    patterns = synthesis.get('patterns', [])
-    for pattern in patterns:
-        if _is_pattern_relevant_to_hypothesis(pattern, hypothesis_keywords):
-            relevant_paper_ids.update(pattern.get('paper_ids', []))
-    
-    # Find relevant key findings (using index-based paper IDs as heuristic)
-    key_findings = synthesis.get('key_findings', [])
-    for index, finding in enumerate(key_findings):
-        if _is_finding_relevant_to_hypothesis(finding, hypothesis_keywords):
-            relevant_paper_ids.add(f"p{index + 1}")
+    for entry_keywords, paper_ids in keyword_index:
+        if not hypothesis_keywords.isdisjoint(entry_keywords):
+            relevant_paper_ids.update(paper_ids)
     
     return list(relevant_paper_ids)
 
 
-def _is_pattern_relevant_to_hypothesis(pattern: Dict[str, Any], hypothesis_keywords: Set[str]) -> bool:
-    """Check if a pattern is relevant to hypothesis keywords."""
-    pattern_description = pattern.get('description', '').lower()
-    pattern_keywords = set(pattern_description.split())
-    return bool(hypothesis_keywords & pattern_keywords)
-
-
-def _is_finding_relevant_to_hypothesis(finding: str, hypothesis_keywords: Set[str]) -> bool:
-    """Check if a finding is relevant to hypothesis keywords."""
-    finding_keywords = set(finding.lower().split())
-    return bool(hypothesis_keywords & finding_keywords)
-
-
 def _extract_all_synthesis_paper_ids(synthesis: Dict[str, Any]) -> List[str]:
     """Extract all paper IDs from synthesis patterns."""
     paper_ids: Set[str] = set()
@@ -335,8 +397,7 @@ def generate_unique_workflow_id(query: str) -> str:
     Returns:
         Unique workflow ID string
     """
-    timestamp = datetime.utcnow().isoformat()
-    content = f"{query}_{timestamp}"
+    content = f"{query}_{time.time_ns()}"
     hash_object = hashlib.md5(content.encode())
     return f"wf_{hash_object.hexdigest()[:12]}"
 
@@ -402,6 +463,10 @@ def merge_search_query_lists(existing_queries: List[str], new_queries: List[str]
     Returns:
         Merged list without duplicates
     """
+    # Nothing to merge in, so skip building the normalized lookup set
+    if not new_queries:
+        return list(existing_queries)
+
     # Use case-insensitive comparison for deduplication
     seen_queries = {query.lower().strip() for query in existing_queries}
     merged_queries = list(existing_queries)
@@ -429,21 +494,21 @@ def analyze_state(state: Dict[str, Any]) -> str:
     status_parts = []
     
     # Check papers
-    papers = state.get("papers", [])
+    papers = state.get("papers") or ()
     if papers:
         status_parts.append(f"Papers: {len(papers)} found")
     else:
         status_parts.append("Papers: None")
     
     # Check synthesis
-    if state.get("synthesis"):
-        synthesis = state["synthesis"]
-        status_parts.append(f"Synthesis: Complete ({len(synthesis.get('patterns', []))} patterns)")
+    synthesis = state.get("synthesis")
+    if synthesis:
+        status_parts.append(f"Synthesis: Complete ({len(synthesis.get('patterns') or ())} patterns)")
     else:
         status_parts.append("Synthesis: Not done")
     
     # Check hypotheses
-    hypotheses = state.get("hypotheses", [])
+    hypotheses = state.get("hypotheses") or ()
     if hypotheses:
         status_parts.append(f"Hypotheses: {len(hypotheses)} generated")
     else:
@@ -457,7 +522,7 @@ def analyze_state(state: Dict[str, Any]) -> str:
         status_parts.append("Validation: Not done")
     
     # Check errors
-    errors = state.get("errors", [])
+    errors = state.get("errors") or ()
     if errors:
         status_parts.append(f"Errors: {len(errors)}")
     
@@ -478,25 +543,24 @@ def format_synthesis_for_prompt(synthesis: Dict[str, Any]) -> str:
     parts = []
     
     # Add patterns
-    patterns = synthesis.get("patterns", [])
+    patterns = synthesis.get("patterns") or ()
     if patterns:
         parts.append("PATTERNS IDENTIFIED:")
-        for i, pattern in enumerate(patterns, 1):
-            parts.append(f"{i}. {pattern.get('description', '')}")
+        parts.append("\n".join(
+            f"{i}. {pattern.get('description', '')}" for i, pattern in enumerate(patterns, 1)
+        ))
     
     # Add key findings
-    findings = synthesis.get("key_findings", [])
+    findings = synthesis.get("key_findings") or ()
     if findings:
         parts.append("\nKEY FINDINGS:")
-        for finding in findings:
-            parts.append(f"- {finding}")
+        parts.append("\n".join(f"- {finding}" for finding in findings))
     
     # Add research gaps
-    gaps = synthesis.get("research_gaps", [])
+    gaps = synthesis.get("research_gaps") or ()
     if gaps:
         parts.append("\nRESEARCH GAPS:")
-        for gap in gaps:
-            parts.append(f"- {gap}")
+        parts.append("\n".join(f"- {gap}" for gap in gaps))
     
     return "\n".join(parts)
 
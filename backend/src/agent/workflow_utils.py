@@ -6,14 +6,17 @@ Common functionality used across multiple nodes.
 import os
 import time
 import asyncio
+import dataclasses
+import hashlib
+import threading
 import concurrent.futures
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
+import numpy as np
+from pydantic import BaseModel
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 
 from agent.configuration import ResearchWorkflowConfiguration
 from agent.state import ResearchState
@@ -39,7 +42,7 @@ class WorkflowLogger:
             stage_data = {
                 "agent": agent_name,
                 "prompt": prompt,
-                "response": response.model_dump() if hasattr(response, 'model_dump') else str(response),
+                "response": response.model_dump() if isinstance(response, BaseModel) else str(response),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             }
             
@@ -53,38 +56,131 @@ class WorkflowLogger:
 
 
 class LLMProvider:
-    """Factory for creating LLM instances."""
+    """Factory for creating LLM instances.
+    
+    Provider SDKs are imported on first use so that only the configured
+    provider's package is loaded.
+    """
+    
+    @staticmethod
+    def _create_openai(model: str, temperature: float):
+        """Create OpenAI chat model."""
+        from langchain_openai import ChatOpenAI
+        
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=os.getenv("OPENAI_API_KEY"),
+        )
+    
+    @staticmethod
+    def _create_anthropic(model: str, temperature: float):
+        """Create Anthropic chat model."""
+        from langchain_anthropic import ChatAnthropic
+        
+        return ChatAnthropic(
+            model=model,
+            temperature=temperature,
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+        )
+    
+    @staticmethod
+    def _create_google(model: str, temperature: float):
+        """Create Google Gemini chat model."""
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            api_key=os.getenv("GEMINI_API_KEY"),
+        )
+    
+    _LLM_FACTORIES = {
+        "openai": _create_openai,
+        "anthropic": _create_anthropic,
+        "google": _create_google,
+    }
     
     @staticmethod
     def create_llm(configurable: ResearchWorkflowConfiguration, temperature: float = 0.7):
         """Create LLM based on configuration."""
         provider = configurable.llm_provider.lower()
+        factory = LLMProvider._LLM_FACTORIES.get(provider, LLMProvider._create_google)
+        return factory(configurable.llm_model, temperature)
+
+
+class SearchResultCache:
+    """Bounded, thread-safe LRU cache of search results with lazy TTL expiry."""
+    
+    __slots__ = ("_entries", "_max_entries", "_ttl_seconds", "_lock")
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self._entries: OrderedDict[bytes, Tuple[List[PreprintPaper], float]] = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        # Graph nodes run in worker threads and share one cache per process
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(query: str, max_results: int) -> bytes:
+        """Hash the normalized query so case and spacing variants share an entry."""
+        normalized_query = " ".join(query.lower().split())
+        return hashlib.sha256(f"{normalized_query}\x00{max_results}".encode()).digest()
+    
+    @staticmethod
+    def _copy_papers(papers: List[PreprintPaper]) -> List[PreprintPaper]:
+        """Copy papers so callers never share mutable Paper objects with the cache."""
+        return [
+            dataclasses.replace(
+                paper,
+                authors=list(paper.authors),
+                categories=list(paper.categories),
+                metadata=dict(paper.metadata),
+            )
+            for paper in papers
+        ]
+    
+    def get(self, key: bytes) -> Optional[List[PreprintPaper]]:
+        """Return a copy of the cached papers, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            papers, stored_at = entry
+            if time.monotonic() - stored_at > self._ttl_seconds:
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
         
-        llm_factories = {
-            "openai": lambda: ChatOpenAI(
-                model=configurable.llm_model,
-                temperature=temperature,
-                api_key=os.getenv("OPENAI_API_KEY"),
-            ),
-            "anthropic": lambda: ChatAnthropic(
-                model=configurable.llm_model,
-                temperature=temperature,
-                api_key=os.getenv("ANTHROPIC_API_KEY"),
-            ),
-            "google": lambda: ChatGoogleGenerativeAI(
-                model=configurable.llm_model,
-                temperature=temperature,
-                api_key=os.getenv("GEMINI_API_KEY"),
-            ),
-        }
-        
-        factory = llm_factories.get(provider, llm_factories["google"])
-        return factory()
+        return self._copy_papers(papers)
+    
+    def put(self, key: bytes, papers: List[PreprintPaper]) -> None:
+        """Store a copy of papers, evicting the least recently used entries when full."""
+        entry = (self._copy_papers(papers), time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
 
 
 class PaperSearcher:
     """Handles arXiv paper searching."""
     
+    # Results of previous searches, shared across workflow runs in this process
+    _search_cache = SearchResultCache()
+    
+    # Worker pool for sync callers inside a running loop, built lazily by _bridge_executor
+    _executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    
     @staticmethod
     async def search_papers_async(query: str, max_results: int) -> List[PreprintPaper]:
         """Perform async paper search."""
@@ -93,24 +189,46 @@ class PaperSearcher:
     
     @staticmethod
     def search_papers_sync(query: str, max_results: int) -> List[PreprintPaper]:
-        """Perform sync paper search with async handling."""
+        """Perform sync paper search, reusing results of identical earlier searches."""
+        cache_key = SearchResultCache.make_key(query, max_results)
+        cached_papers = PaperSearcher._search_cache.get(cache_key)
+        if cached_papers is not None:
+            return cached_papers
+        
+        papers = PaperSearcher._run_sync(
+            lambda: PaperSearcher.search_papers_async(query, max_results)
+        )
+        # Empty feeds are often transient, so don't pin them for the cache TTL
+        if papers:
+            PaperSearcher._search_cache.put(cache_key, papers)
+        return papers
+    
+    @staticmethod
+    def _bridge_executor() -> concurrent.futures.ThreadPoolExecutor:
+        """Shared worker pool for running searches while an event loop is active, created once on first use."""
+        # Double-checked locking so concurrent first callers don't each build a pool
+        if PaperSearcher._executor is None:
+            with PaperSearcher._executor_lock:
+                if PaperSearcher._executor is None:
+                    PaperSearcher._executor = concurrent.futures.ThreadPoolExecutor(
+                        thread_name_prefix="paper-search"
+                    )
+        return PaperSearcher._executor
+    
+    @staticmethod
+    def _run_sync(make_coroutine: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a coroutine from sync code with async handling."""
         try:
             loop = asyncio.get_event_loop()
             if loop.is_running():
                 # Run in thread pool if already in event loop
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(
-                        asyncio.run, 
-                        PaperSearcher.search_papers_async(query, max_results)
-                    )
-                    return future.result(timeout=30)
+                future = PaperSearcher._bridge_executor().submit(asyncio.run, make_coroutine())
+                return future.result(timeout=30)
             else:
-                return loop.run_until_complete(
-                    PaperSearcher.search_papers_async(query, max_results)
-                )
+                return loop.run_until_complete(make_coroutine())
         except RuntimeError:
             # No event loop, create new one
-            return asyncio.run(PaperSearcher.search_papers_async(query, max_results))
+            return asyncio.run(make_coroutine())
 
 
 class PaperProcessor:
@@ -119,15 +237,39 @@ class PaperProcessor:
     @staticmethod
     def deduplicate_papers(papers: List[PreprintPaper]) -> List[PreprintPaper]:
         """Remove duplicate papers based on ID."""
-        seen_ids = set()
-        unique_papers = []
+        # First paper seen for each ID wins
+        papers_by_id: Dict[str, PreprintPaper] = {}
         
         for paper in papers:
-            if paper.id not in seen_ids:
-                seen_ids.add(paper.id)
-                unique_papers.append(paper)
+            papers_by_id.setdefault(paper.id, paper)
+        
+        return list(papers_by_id.values())
+    
+    @staticmethod
+    def _days_since_published(paper_dict: Dict[str, Any]) -> float:
+        """Get paper age in days, or NaN if the date cannot be parsed."""
+        try:
+            pub_date = datetime.fromisoformat(
+                paper_dict["date_published"].replace("Z", "+00:00")
+            )
+            return float((datetime.now(pub_date.tzinfo) - pub_date).days)
+        except Exception:
+            return float("nan")
+    
+    @staticmethod
+    def calculate_paper_scores(papers: List[Dict[str, Any]]) -> np.ndarray:
+        """Calculate combined ranking scores for a batch of papers in one pass."""
+        count = len(papers)
+        relevance = np.fromiter((p.get("relevance_score", 0.5) for p in papers), dtype=np.float64, count=count)
+        quality = np.fromiter((p.get("quality_score", 0.5) for p in papers), dtype=np.float64, count=count)
+        days_old = np.fromiter(
+            (PaperProcessor._days_since_published(p) for p in papers), dtype=np.float64, count=count
+        )
+        
+        # Recency boost for papers from last 2 years (NaN ages get no boost)
+        recency_boost = np.where(days_old < 730, 0.1 * (1 - days_old / 730), 0.0)
         
-        return unique_papers
+        return (relevance + quality) / 2 + recency_boost
     
     @staticmethod
     def calculate_paper_score(paper_dict: Dict[str, Any]) -> float:
@@ -137,27 +279,18 @@ class PaperProcessor:
             paper_dict.get("quality_score", 0.5)
         ) / 2
         
-        # Add recency boost for papers from last 2 years
-        try:
-            pub_date = datetime.fromisoformat(
-                paper_dict["date_published"].replace("Z", "+00:00")
-            )
-            days_old = (datetime.now(pub_date.tzinfo) - pub_date).days
-            if days_old < 730:  # 2 years
-                recency_boost = 0.1 * (1 - days_old / 730)
-                base_score += recency_boost
-        except Exception:
-            pass  # Use base score if date parsing fails
+        # Add recency boost for papers from last 2 years (base score if date is unparseable)
+        days_old = PaperProcessor._days_since_published(paper_dict)
+        if days_old < 730:
+            base_score += 0.1 * (1 - days_old / 730)
             
         return base_score
     
     @staticmethod
     def convert_papers_to_dict(papers: List[PreprintPaper]) -> List[Dict[str, Any]]:
         """Convert PreprintPaper objects to dict format."""
-        paper_dicts = []
-        
-        for paper in papers:
-            paper_dict = {
+        return [
+            {
                 "id": paper.id,
                 "title": paper.title,
                 "abstract": paper.abstract,
@@ -174,14 +307,19 @@ class PaperProcessor:
                 "quality_score": paper.quality_score,
                 "metadata": paper.metadata
             }
-            paper_dicts.append(paper_dict)
-        
-        return paper_dicts
+            for paper in papers
+        ]
     
     @staticmethod
-    def rank_papers(papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Rank papers by relevance, quality, and recency."""
-        return sorted(papers, key=PaperProcessor.calculate_paper_score, reverse=True)
+    def rank_papers(papers: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank papers by relevance, quality, and recency, optionally keeping only the top ``limit``."""
+        if not papers:
+            return []
+        
+        scores = PaperProcessor.calculate_paper_scores(papers)
+        # Stable sort so tied papers keep their input order
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [papers[i] for i in order]
 
 
 class RateLimiter:
@@ -193,8 +331,8 @@ class RateLimiter:
         time.sleep(delay_seconds)
     
     @staticmethod
-    def apply_search_delay(delay_seconds: float = 1.0) -> None:
-        """Apply delay between search operations."""
+    def apply_search_delay(delay_seconds: float = 3.0) -> None:
+        """Apply delay between search operations (arXiv allows one request every 3 seconds)."""
         time.sleep(delay_seconds)
 
 